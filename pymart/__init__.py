@@ -6,4 +6,7 @@ Created on Wed Jan 18 18:47:38 2023
 """
 
 from .base import FrontBase, DataBase, DataSet
-from .funcs import list_databases, find_dataset, fetch_data, get_attributes, get_filters
+from .funcs import (list_databases, find_dataset, fetch_data, fetch_many,
+                    get_attributes, get_filters, cache_clear, cache_info,
+                    forget_memoised)
+from ._session import set_rate_limit
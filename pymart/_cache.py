@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Small on-disk cache for raw BioMart responses.
+
+BioMart registry, dataset listing and configuration payloads are
+essentially static between releases, so repeat runs can skip the
+network round-trip entirely. Each entry is a file of raw response
+bytes under ~/.cache/pymart, keyed by a hash of the connection
+parameters, and expires after CACHE_TTL seconds.
+
+Created on Thu Aug 27 10:12:04 2026
+@author: ivanp
+"""
+import hashlib
+import os
+import time
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pymart")
+CACHE_TTL = 7 * 86400
+
+# bump whenever the layout of the cached entries changes;
+# a mismatch drops every stored entry on first use
+CACHE_VERSION = 1
+
+_version_checked = False
+
+
+def _check_version():
+    """Drops the cache once per process if it predates CACHE_VERSION"""
+    global _version_checked
+    if _version_checked:
+        return
+    _version_checked = True
+    version_file = os.path.join(CACHE_DIR, "version")
+    try:
+        with open(version_file) as file:
+            if int(file.read().strip()) == CACHE_VERSION:
+                return
+    except (OSError, ValueError):
+        pass
+    clear()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(version_file, "w") as file:
+            file.write(str(CACHE_VERSION))
+    except OSError:
+        pass
+
+
+def clear():
+    """Removes every cached response from disk"""
+    try:
+        entries = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.endswith(".bin"):
+            try:
+                os.remove(os.path.join(CACHE_DIR, entry))
+            except OSError:
+                pass
+
+
+def info():
+    """Returns the location, entry count and total size of the cache"""
+    entries = 0
+    size = 0
+    try:
+        for entry in os.listdir(CACHE_DIR):
+            if entry.endswith(".bin"):
+                entries += 1
+                size += os.path.getsize(os.path.join(CACHE_DIR, entry))
+    except OSError:
+        pass
+    return {"location": CACHE_DIR, "entries": entries, "size_bytes": size}
+
+
+def _key_path(key):
+    """Maps a key tuple to its file path inside CACHE_DIR"""
+    digest = hashlib.sha1(
+        "|".join(str(part) for part in key).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, digest + ".bin")
+
+
+def get(key):
+    """Returns cached bytes for a key, or None on miss or expiry"""
+    _check_version()
+    path = _key_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def put(key, content):
+    """Stores raw response bytes under a key, best effort"""
+    _check_version()
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_key_path(key), "wb") as file:
+            file.write(content)
+    except OSError:
+        pass
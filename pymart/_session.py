@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Shared HTTP session for all PyMart calls.
+
+A single pooled Session gives keep-alive connection reuse across
+registry, configuration and data queries, asks for gzip-compressed
+transfers (BioMart XML/TSV compresses 5-10x) and retries transient
+server errors with exponential backoff. The pool is sized to cover
+the concurrent fetch paths, and a token bucket keeps those paths
+below BioMart's per-IP throttle (roughly 3 requests per second).
+
+Created on Sat Aug 29 09:21:47 2026
+@author: ivanp
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket - at most "rate" acquisitions per second,
+    shared by every thread issuing requests through the session
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate,
+                                   self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class _RateLimitedSession(requests.Session):
+    """Session whose every request first passes the shared token bucket"""
+
+    bucket = _TokenBucket(rate=3)
+
+    def request(self, method, url, **kwargs):
+        self.bucket.acquire()
+        return super().request(method, url, **kwargs)
+
+
+def set_rate_limit(n_per_sec):
+    """
+    Caps outgoing requests at "n_per_sec" per second across all threads.
+    BioMart throttles aggressively, so raise this only against servers
+    you control.
+    """
+    if n_per_sec <= 0:
+        raise ValueError("Rate limit must be a positive number")
+    _RateLimitedSession.bucket = _TokenBucket(rate=n_per_sec)
+
+
+# Retry-After headers on 429 responses are honoured by urllib3's Retry
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                       max_retries=Retry(total=5, backoff_factor=0.5,
+                                         status_forcelist=[429, 500, 502,
+                                                           503, 504]))
+
+SESSION = _RateLimitedSession()
+SESSION.headers.update({"Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive"})
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
@@ -151,16 +151,47 @@ Created on Wed Jan 11 14:52:39 2023
 """
 
 
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, astuple
+from functools import lru_cache, cached_property
 from typing import Dict, List
-from xml.etree import ElementTree
-from io import StringIO
+from io import StringIO, BytesIO, BufferedReader
 from time import perf_counter
+from xml.sax.saxutils import quoteattr
 
 import re
-import requests
+import numpy as np
 import pandas as pd
 
+try:
+    from lxml import etree as ElementTree
+except ImportError:
+    from xml.etree import ElementTree
+
+# arrow-backed strings store one contiguous buffer instead of a python
+# object per cell, cutting result memory several-fold; callers stuck on
+# pandas < 2.0 or without pyarrow simply keep the object-dtype path
+try:
+    import pyarrow  # noqa: F401  # pylint: disable=unused-import
+    _ARROW_KWARGS = {"dtype_backend": "pyarrow"} if int(
+        pd.__version__.split(".")[0]) >= 2 else {}
+except ImportError:
+    _ARROW_KWARGS = {}
+
+from . import _cache
+from ._session import SESSION as _SESSION
+
+
+_HOMOLOG_RE = re.compile(r"^(?P<spc>[^_]*)_homolog_(?P<wht>.*)$")
+
+
+def match_homology(string):
+    """Splits a homology attribute name into (species, qualifier)"""
+    match = _HOMOLOG_RE.match(string)
+    if match:
+        return match.group("spc"), match.group("wht")
+    return None, None
+
 
 class ServiceUnavailableError(Exception):
     """Exception raised when the service is temporarily unavailable."""
@@ -169,6 +200,61 @@ class ServiceUnavailableError(Exception):
         super().__init__(message)
 
 
+def _http_get(host, port, path, **params):
+    """Module-level GET through the shared session"""
+    r = _SESSION.get(f"{host}:{port}{path}", params=params, timeout=60)
+    r.raise_for_status()
+    return r
+
+
+@lru_cache(maxsize=64)
+def _cached_registry(host, port, path):
+    """Registry bytes, shared across instances within a process"""
+    cache_key = (host, port, path, "registry")
+    content = _cache.get(cache_key)
+    if content is None:
+        content = _http_get(host, port, path, type="registry").content
+        _cache.put(cache_key, content)
+    return content
+
+
+@lru_cache(maxsize=64)
+def _cached_datasets(host, port, path, mart):
+    """Dataset listing bytes, shared across instances within a process"""
+    cache_key = (host, port, path, mart, "datasets")
+    content = _cache.get(cache_key)
+    if content is None:
+        content = _http_get(host, port, path,
+                            type="datasets", mart=mart).content
+        _cache.put(cache_key, content)
+    return content
+
+
+def _fetch_config(host, port, path, dataset, use_disk=True):
+    """Downloads and validates configuration bytes for one dataset"""
+    cache_key = (host, port, path, dataset, "config")
+    if use_disk:
+        content = _cache.get(cache_key)
+        if content is not None:
+            return content
+    r = _http_get(host, port, path, type="configuration", dataset=dataset)
+    content_type = r.headers.get('Content-Type')
+    if 'text/html' in content_type:
+        html_content = r.content.decode('utf-8')
+        if "Service Unavailable" in html_content or "Error" in html_content:
+            raise ServiceUnavailableError(
+                "The service is temporarily unavailable. Received HTML response: " + html_content)
+        raise ServiceUnavailableError(
+            "Unexpected HTML response received: " + html_content)
+    if "Problem retrieving configuration" in r.text:
+        raise KeyError("Problem retrieving configuration")
+    _cache.put(cache_key, r.content)
+    return r.content
+
+
+_cached_config = lru_cache(maxsize=64)(_fetch_config)
+
+
 @dataclass
 class Base:
     """
@@ -184,9 +270,9 @@ class Base:
         """Url to connect to database"""
         return f"{self.host}:{self.port}{self.path}"
 
-    def get(self, **params):
+    def get(self, stream=False, **params):
         """Base method for fetching a query"""
-        r = requests.get(self.url, params=params)
+        r = _SESSION.get(self.url, params=params, timeout=60, stream=stream)
         r.raise_for_status()
         return r
 
@@ -215,19 +301,22 @@ class DataBase(Base):
 
     def __post_init__(self):
         self._datasets = pd.DataFrame(columns=["name", "display_name"])
+        self._lc_display = None
+        self._lc_name = None
 
     def _get_datasets(self):
         """
         dataset constructor
         """
         if self.name:
-            response = self.get(type='datasets', mart=self.name)
-
-            # Read result frame from response.
-            result = pd.read_csv(StringIO(response.text), sep='\t',
-                                 header=None, )[[1, 2]]
-
-            result.columns = ["name", "display_name"]
+            content = _cached_datasets(
+                self.host, self.port, self.path, self.name)
+
+            # Read result frame from response - only the two columns
+            # that are actually kept are parsed.
+            result = pd.read_csv(BytesIO(content), sep='\t', header=None,
+                                 usecols=[1, 2], names=["name", "display_name"],
+                                 dtype=str, engine="c")
             return result
         return self._datasets
 
@@ -253,15 +342,20 @@ class DataBase(Base):
                 raise ValueError("No name for a given database")
             raise ValueError("No datasets found for name")
 
-        result = ds[ds.display_name.str.contains(specie, case=False, regex=True) |
-                    ds["name"].str.contains(specie, case=False, regex=True)]
-        if len(result) == 0:
+        if self._lc_display is None:
+            self._lc_display = np.char.lower(
+                ds["display_name"].to_numpy().astype(str))
+            self._lc_name = np.char.lower(ds["name"].to_numpy().astype(str))
+
+        specie = specie.lower()
+        mask = (np.char.find(self._lc_display, specie) >= 0) | \
+               (np.char.find(self._lc_name, specie) >= 0)
+        if not mask.any():
             specie = specie.replace("_", " ")
-            result = ds[ds.display_name.str.contains(
-                specie, case=False, regex=True)]
-        if len(result) == 0:
+            mask = np.char.find(self._lc_display, specie) >= 0
+        if not mask.any():
             raise ValueError(f"Database does not contain '{specie}'")
-        return result
+        return ds[mask]
 
     def print_species(self, specie):
         """
@@ -291,25 +385,54 @@ class FrontBase(Base):
                                     }
                                     )
     _databases: List[DataBase] = field(default_factory=list)
+    _databases_df: pd.DataFrame = field(default=None, init=False)
 
     @property
     def databases(self):
         """All databases in the form of a pandas dataframe"""
         if len(self._databases) == 0:
             self._databases = self._get_databases()
-        return pd.DataFrame(self._databases)
+            self._databases_df = None
+        if self._databases_df is None:
+            self._databases_df = pd.DataFrame.from_records(
+                [(db.name, db.display_name, db.host,
+                  db.path, db.port, db.virtual_schema) for db in self._databases],
+                columns=("name", "display_name", "host",
+                         "path", "port", "virtual_schema"))
+        return self._databases_df.copy(deep=False)
 
     def _get_databases(self):
         """Constructor function for databases (1/2)"""
-        r = self.get(type="registry")
-        xml = ElementTree.fromstring(r.content)
-        return [self._db_from_xml(node) for node in xml.findall('MartURLLocation')]
+        content = _cached_registry(self.host, self.port, self.path)
+        databases = []
+        for _, node in ElementTree.iterparse(BytesIO(content)):
+            if node.tag == "MartURLLocation":
+                databases.append(self._db_from_xml(node))
+                node.clear()
+        return databases
 
     def _db_from_xml(self, node):
         """Constructor function for databases (2/2)"""
         params = {k: node.attrib[v] for k, v in self.xml_map.items()}
+        # the registry reports a scheme-less host ("www.ensembl.org")
+        if not params["host"].startswith(("http://", "https://")):
+            params["host"] = "http://" + params["host"]
         return DataBase(**params)
 
+    def get_database(self, name):
+        """
+        Returns the DataBase instance constructed from the registry
+        for a given internal name, reusing its connection parameters
+        and any datasets it has already fetched.
+        """
+        if len(self._databases) == 0:
+            self._databases = self._get_databases()
+            self._databases_df = None
+        for database in self._databases:
+            if database.name == name:
+                return database
+        raise ValueError(f"No database named '{name}'")
+
     def list_databases(self):
         """Returns databases in the form of pandas dataframe"""
         return self.databases
@@ -348,7 +471,7 @@ class Filter:
     type: str
     operator: str
     sub_options: bool
-    options: pd.DataFrame
+    options: List[Dict[str, str]]
 
     def explain_filter(self, print_options=True):
         """
@@ -360,7 +483,8 @@ class Filter:
             f"Filter's operator is '{self.operator}' and its type is '{self.type}'")
         if self.sub_options and print_options:
             print("It has sub options:")
-            print(self.options.to_string(index=False, justify="center"))
+            print(pd.DataFrame(self.options).to_string(
+                index=False, justify="center"))
 
 
 @dataclass
@@ -391,60 +515,104 @@ class DataSet(Base):
 
     def __post_init__(self):
         self._homology = pd.DataFrame()
+        self._config_bytes = None
+        self._attributes_df = None
+        self._filters_df = None
+        self._lc_homology = None
+        self._homology_populated = False
+        self._hom_attr_cache = {}
+        self._query_cache = {}
 
     @property
     def config_xml(self):
         """Configuration xml file - used to fetch datasets"""
         if self._config_xml is None:
-            self._config_xml = self._get_config_xml()
+            self._config_xml = ElementTree.fromstring(self._get_config_xml())
         return self._config_xml
 
-    def _get_config_xml(self):
-        """Constructor for config_xml file"""
-        r = self.get(type='configuration', dataset=self.name)
-        content_type = r.headers.get('Content-Type')
-        if 'text/html' in content_type:
-            html_content = r.content.decode('utf-8')
-            if "Service Unavailable" in html_content or "Error" in html_content:
-                raise ServiceUnavailableError(
-                    "The service is temporarily unavailable. Received HTML response: " + html_content)
-            raise ServiceUnavailableError(
-                "Unexpected HTML response received: " + html_content)
-        if "Problem retrieving configuration" in r.text:
-            raise KeyError("Problem retrieving configuration")
-        return ElementTree.fromstring(r.content)
+    def _get_config_xml(self, force_refresh=False):
+        """Constructor for config_xml file - returns the raw response bytes"""
+        if self._config_bytes is not None and not force_refresh:
+            return self._config_bytes
+        if force_refresh:
+            self._config_bytes = _fetch_config(self.host, self.port, self.path,
+                                               self.name, use_disk=False)
+            self._config_xml = None
+            self.clear_cache()
+        else:
+            self._config_bytes = _cached_config(self.host, self.port, self.path,
+                                                self.name)
+        return self._config_bytes
+
+    @classmethod
+    def clear_cache(cls):
+        """Clears the in-process response caches shared across instances"""
+        _cached_config.cache_clear()
+        _cached_datasets.cache_clear()
+        _cached_registry.cache_clear()
 
     @property
     def attributes(self):
         """Attributes in the form of dataframe"""
-        if len(self._attributes) == 0:
-            self.populate_attributes()
-        return pd.DataFrame(self._attributes)
+        if self._attributes_df is None:
+            if len(self._attributes) == 0:
+                self.populate_attributes()
+            self._attributes_df = pd.DataFrame.from_records(
+                [astuple(at) for at in self._attributes],
+                columns=("name", "display_name", "description", "default")
+            ).astype({"default": bool})
+        return self._attributes_df
 
     @property
     def filters(self):
         """Filters in the form of dataframe"""
-        if len(self._filters) == 0:
-            self.populate_filters()
-        df = pd.DataFrame(self._filters)
-        df.pop("options")
-        return df
+        if self._filters_df is None:
+            if len(self._filters) == 0:
+                self.populate_filters()
+            # "options" is left out here rather than popped afterwards,
+            # which would trigger a copy of the whole frame
+            self._filters_df = pd.DataFrame.from_records(
+                [(ft.name, ft.display_name, ft.description,
+                  ft.type, ft.operator, ft.sub_options) for ft in self._filters],
+                columns=("name", "display_name", "description",
+                         "type", "operator", "sub_options"))
+        return self._filters_df
+
+    @cached_property
+    def default_attributes(self):
+        """Names of the attributes fetched when none are specified"""
+        return tuple(self.attributes.loc[self.attributes["default"], "name"])
 
     @property
     def homology(self):
         """Data about homology towards other species"""
-        if len(self._homology) == 0:
+        if not self._homology_populated:
             self.populate_homology()
         return self._homology
 
-    def populate_attributes(self, force=False):
-        """Constructor for attributes property"""
-        if len(self._attributes) > 0 and not force:
-            return self._attributes
-
-        for page_index, page in enumerate(self.config_xml.iter("AttributePage")):
-            for desc in page.iter("AttributeDescription"):
-                attrib = desc.attrib
+    def _parse_config_once(self):
+        """
+        Constructor for both attributes and filters.
+        Streams the configuration xml in a single pass, discarding
+        every element once processed so memory stays bounded.
+        """
+        self._attributes = []
+        self._filters = []
+        self._attributes_df = None
+        self._filters_df = None
+        self.__dict__.pop("default_attributes", None)
+        self._query_cache = {}
+        page_index = -1
+
+        for event, elem in ElementTree.iterparse(BytesIO(self._get_config_xml()),
+                                                 events=("start", "end")):
+            if event == "start":
+                if elem.tag == "AttributePage":
+                    page_index += 1
+                continue
+
+            if elem.tag == "AttributeDescription":
+                attrib = elem.attrib
                 is_default = (attrib.get("default", "") ==
                               "true") and (page_index == 0)
 
@@ -453,53 +621,65 @@ class DataSet(Base):
                                description=attrib.get('description', ''),
                                default=is_default)
                 self._attributes.append(at)
+                elem.clear()
+
+            elif elem.tag == "FilterDescription":
+                attrib = elem.attrib
+                # check for submenus - the dataframe over these
+                # is only materialized when explain_filter prints it
+                options = [dict(sub_el.attrib) for sub_el in elem]
+                sub_options = bool(options)
+
+                ft = Filter(name=attrib["internalName"],
+                            type=attrib.get("type", ""),
+                            description=attrib.get("description", ""),
+                            display_name=attrib.get("displayName", ""),
+                            operator=attrib.get("qualifier", ""),
+                            sub_options=sub_options,
+                            options=options
+                            )
+                self._filters.append(ft)
+                elem.clear()
+
+    def populate_attributes(self, force=False, force_refresh=False):
+        """
+        Constructor for attributes property.
+        Pass "force_refresh=True" to bypass the on-disk response cache
+        and re-download the configuration.
+        """
+        if force_refresh:
+            self._get_config_xml(force_refresh=True)
+            force = True
+        if len(self._attributes) > 0 and not force:
+            return self._attributes
+        self._parse_config_once()
         return self._attributes
 
-    def populate_filters(self, force=False):
-        """Constructor for filters property"""
+    def populate_filters(self, force=False, force_refresh=False):
+        """
+        Constructor for filters property.
+        Pass "force_refresh=True" to bypass the on-disk response cache
+        and re-download the configuration.
+        """
+        if force_refresh:
+            self._get_config_xml(force_refresh=True)
+            force = True
         if len(self._filters) > 0 and not force:
             return self._filters
-
-        for node in self.config_xml.iter("FilterDescription"):
-
-            attrib = node.attrib
-            # check for submenus
-            if len(list(node)) == 0:
-                options = pd.DataFrame()
-                sub_options = False
-            else:
-                options = pd.DataFrame(
-                    [sub_el.attrib for sub_el in list(node)])
-                sub_options = True
-
-            ft = Filter(name=attrib["internalName"],
-                        type=attrib.get("type", ""),
-                        description=attrib.get("description", ""),
-                        display_name=attrib.get("displayName", ""),
-                        operator=attrib.get("qualifier", ""),
-                        sub_options=sub_options,
-                        options=options
-                        )
-            self._filters.append(ft)
+        self._parse_config_once()
         return self._filters
 
     def populate_homology(self, force=False):
         """Constructor for homology property"""
-        if len(self._homology) > 0 and not force:
+        if self._homology_populated and not force:
             return self._homology
 
         homology_dataset = self.attributes[self.attributes.name.str.contains(
             "homolog")].copy()
 
-        def match_homology(string):
-            match = re.match("(?P<spc>[^_]*)_homolog_(?P<wht>.*$)", string)
-            if match:
-                groups = match.groupdict()
-                return groups["spc"], groups["wht"]
-            return None, None
-
-        homology_dataset[["specie_name", "qualifier_name"]] = homology_dataset.apply(lambda row: match_homology(row["name"]),
-                                                                                     axis=1, result_type="expand")
+        extracted = homology_dataset["name"].str.extract(_HOMOLOG_RE)
+        homology_dataset[["specie_name", "qualifier_name"]
+                         ] = extracted[["spc", "wht"]]
         homology_dataset = homology_dataset[~(
             homology_dataset.specie_name.isna())]
         homology_dataset.drop(["description", "default"], axis=1, inplace=True)
@@ -512,9 +692,14 @@ class DataSet(Base):
         species_mapper = dict(zip(_sep["specie_name"], _sep["display_name"]))
         homology_dataset["specie_display_name"] = homology_dataset["specie_name"].map(
             species_mapper)
-        homology_dataset["qualifier_display_name"] = homology_dataset.apply(lambda row: row["display_name"].replace(row["specie_display_name"], ""),
-                                                                            axis=1)
+        homology_dataset["qualifier_display_name"] = [dn.replace(sdn, "") for dn, sdn in
+                                                      zip(homology_dataset["display_name"],
+                                                          homology_dataset["specie_display_name"])]
         self._homology = homology_dataset
+        self._lc_homology = None
+        self._hom_attr_cache.clear()
+        self._homology_populated = True
+        return self._homology
 
     def print_attributes(self):
         """Prints out attributes"""
@@ -543,41 +728,8 @@ class DataSet(Base):
 
         self._filters[index].explain_filter(print_options)
 
-    @staticmethod
-    def add_attributes(name, subelem):
-        """Add attributes to query"""
-        at_el = ElementTree.SubElement(subelem, "Attribute")
-        at_el.set("name", name)
-
-    @staticmethod
-    def add_filters(filter_row, filter_query, subelem):
-        """Add filters to query"""
-        value = filter_query.get(filter_row["name"], None)
-        if value is None:
-            value = filter_query.get(filter_row["display_name"], None)
-        if value is None:
-            raise ValueError(
-                f"""There is no value specified for key '{filter_row["name"]}'""")
-
-        ft_el = ElementTree.SubElement(subelem, "Filter")
-        ft_el.set("name", filter_row["name"])
-
-        if filter_row["type"] == "boolean":
-            if value is True or value in ["included", "only"]:
-                ft_el.set("excluded", "0")
-            elif value is False or value in ["excluded"]:
-                ft_el.set("excluded", "1")
-            else:
-                raise ValueError(f"Invalid value for boolean filter : {value}")
-
-        elif isinstance(value, (list, tuple)):
-            value = ",".join([str(x) for x in value])
-            ft_el.set("value", value)
-
-        else:
-            ft_el.set("value", str(value))
-
-    def fetch(self, attributes=None, filters=None, only_unique=True):
+    def fetch(self, attributes=None, filters=None, only_unique=True,
+              server_dedup=False, chunksize=None):
         """
         The most important method in this class. Retrieves data
         associated with a particular instance of this class.
@@ -595,6 +747,19 @@ class DataSet(Base):
 
         only_unique : boolean
             Whether or not to return the unique rows.
+            Duplicates are dropped locally via pandas after parsing.
+
+        server_dedup : boolean
+            Asks the BioMart server to drop duplicate rows itself
+            (uniqueRows="1"). Server-side deduplication forces a
+            sort-and-dedupe on the shared BioMart node and can add
+            noticeable latency, so it is off by default.
+
+        chunksize : int or None
+            When set, the response is parsed in blocks of this many
+            rows (deduplicated per block when "only_unique") instead
+            of in one go, which keeps parsing overlapped with the
+            network receive on very large pulls.
 
         Example query:
 
@@ -613,40 +778,141 @@ class DataSet(Base):
             found only on chromosomes 1 and 2, without Transcription Support Level.
             There is no filter named "mabearpig_gene", so the filter is ignored
         """
+        query = self._build_query(attributes, filters, server_dedup)
+        _s = perf_counter()
+        with self.get(stream=True, query=query) as r:
+            r.raw.decode_content = True
+            reader = BufferedReader(r.raw)
+            # BioMart reports errors inline at the top of the body,
+            # so peeking the head is enough - the full response is
+            # never materialized just for error detection
+            head = reader.peek(4096)
+            if b'Query ERROR' in head:
+                raise ValueError(head.decode("utf-8", errors="replace"))
+            if chunksize is None:
+                result = pd.read_csv(reader, **_ARROW_KWARGS)
+            else:
+                chunks = []
+                for chunk in pd.read_csv(reader, chunksize=chunksize,
+                                         **_ARROW_KWARGS):
+                    if only_unique:
+                        chunk = chunk.drop_duplicates()
+                    chunks.append(chunk)
+                result = pd.concat(chunks, ignore_index=True)
+        _e = perf_counter()
+        print(f"Dataset fetched in {_e-_s:.2f} seconds")
+        if only_unique:
+            result = result.drop_duplicates(ignore_index=True)
+        return result
 
-        query = ElementTree.Element("Query")
-        query.set("virtualSchemaName", self.virtual_schema)
-        query.set("formatter", "CSV")
-        query.set("header", "1")
-        query.set("uniqueRows", str(int(only_unique)))
-        query.set("datasetConfigVersion", "0.6")
-
-        dataset = ElementTree.SubElement(query, 'Dataset')
-        dataset.set('name', self.name)
-        dataset.set('interface', 'default')
+    def _build_query(self, attributes=None, filters=None, server_dedup=False):
+        """
+        Builds the serialized Query xml sent to the martservice.
+        Rendered queries are memoized per instance, so repeated calls
+        with the same attributes and filters skip the assembly work.
+        """
+        attrs_key = tuple(attributes) if attributes is not None else None
+        filters_key = None
+        if filters is not None:
+            filters_key = tuple((key, tuple(value) if isinstance(value, (list, tuple))
+                                 else value) for key, value in filters.items())
+
+        cache_key = (attrs_key, filters_key, bool(server_dedup))
+        try:
+            rendered = self._query_cache.get(cache_key)
+        except TypeError:
+            # unhashable attribute or filter values - render without memoizing
+            return self._render_query(attributes, filters, server_dedup)
+        if rendered is None:
+            rendered = self._render_query(attributes, filters, server_dedup)
+            self._query_cache[cache_key] = rendered
+        return rendered
+
+    def _render_query(self, attributes=None, filters=None, server_dedup=False):
+        """Renders the Query xml string fragments and joins them"""
+        parts = [f'<Query virtualSchemaName={quoteattr(self.virtual_schema)} '
+                 f'formatter="CSV" header="1" uniqueRows="{int(server_dedup)}" '
+                 'datasetConfigVersion="0.6">'
+                 f'<Dataset name={quoteattr(self.name)} interface="default">']
 
         if attributes is None:
-            attributes = self.attributes[self.attributes.default]
+            names = self.default_attributes
         else:
-            attributes = self.attributes[(self.attributes.name.isin(attributes)) |
-                                         (self.attributes.display_name.isin(attributes))]
+            attribute_df = self.attributes
+            mask = (attribute_df.name.isin(attributes)) | \
+                   (attribute_df.display_name.isin(attributes))
+            names = attribute_df.loc[mask, "name"].to_numpy()
 
-        attributes = attributes["name"].apply(
-            self.add_attributes, subelem=dataset)
+        for name in names:
+            parts.append(f'<Attribute name={quoteattr(name)}/>')
 
         if filters is not None:
-            filter_df = self.filters[(self.filters.name.isin(filters.keys())) |
-                                     (self.filters.display_name.isin(filters.keys()))].copy()
-            filter_df.apply(self.add_filters, axis=1,
-                            filter_query=filters, subelem=dataset)
-        _s = perf_counter()
-        r = self.get(query=ElementTree.tostring(query))
-        _e = perf_counter()
-        print(f"Dataset fetched in {_e-_s:.2f} seconds")
-        if 'Query ERROR' in r.text:
-            raise ValueError(r.text)
+            all_filters = self.filters
+            filter_df = all_filters[(all_filters.name.isin(filters.keys())) |
+                                    (all_filters.display_name.isin(filters.keys()))]
+            for name, ftype, display_name in zip(filter_df["name"].to_numpy(),
+                                                 filter_df["type"].to_numpy(),
+                                                 filter_df["display_name"].to_numpy()):
+                value = filters.get(name, None)
+                if value is None:
+                    value = filters.get(display_name, None)
+                if value is None:
+                    raise ValueError(
+                        f"There is no value specified for key '{name}'")
+
+                if ftype == "boolean":
+                    if value is True or value in ["included", "only"]:
+                        excluded = "0"
+                    elif value is False or value in ["excluded"]:
+                        excluded = "1"
+                    else:
+                        raise ValueError(
+                            f"Invalid value for boolean filter : {value}")
+                    parts.append(
+                        f'<Filter name={quoteattr(name)} excluded="{excluded}"/>')
+                    continue
+
+                if isinstance(value, (list, tuple)):
+                    value = ",".join([str(x) for x in value])
+                parts.append(
+                    f'<Filter name={quoteattr(name)} value={quoteattr(str(value))}/>')
+
+        parts.append('</Dataset></Query>')
+        return "".join(parts).encode()
+
+    @classmethod
+    def fetch_many(cls, datasets, attributes=None, filters=None,
+                   only_unique=True, server_dedup=False,
+                   max_workers=4, **url_kwargs):
+        """
+        Fetches several datasets concurrently.
 
-        return pd.read_csv(StringIO(r.text),)
+        datasets : python iterable of DataSet or str
+            Datasets to fetch. Strings are taken as dataset names and
+            turned into DataSet instances (optional keyword arguments
+            such as "host" are forwarded to them).
+        attributes, filters, only_unique, server_dedup
+            Same meaning as in "fetch", applied to every dataset.
+        max_workers : int
+            How many queries run at the same time.
+
+        Returns a dictionary mapping dataset name to its dataframe,
+        in the order the datasets were given.
+
+        Example:
+            >>> species = ["hsapiens_gene_ensembl","mmusculus_gene_ensembl"]
+            >>> data = DataSet.fetch_many(species)
+        """
+        datasets = [ds if isinstance(ds, DataSet) else cls(name=ds, **url_kwargs)
+                    for ds in datasets]
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(ds.fetch, attributes, filters,
+                                       only_unique, server_dedup): ds
+                       for ds in datasets}
+            for future in as_completed(futures):
+                results[futures[future].name] = future.result()
+        return {ds.name: results[ds.name] for ds in datasets}
 
     def extract_homology_attributes(self, species, query):
         """
@@ -677,15 +943,26 @@ class DataSet(Base):
         There will be a total of 15 (3 species and 5 queries) attributes.
 
         """
+        cache_key = (tuple(species), tuple(query))
+        cached = self._hom_attr_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         hm = self.homology
 
-        result = list()
-        for specie in species:
-            sp_df = hm[(hm.specie_name.str.contains(specie, case=False, regex=False)) | (
-                hm.specie_display_name.str.contains(specie, case=False, regex=False))]
-            result.append(sp_df)
+        if self._lc_homology is None:
+            self._lc_homology = (
+                np.char.lower(hm["specie_name"].to_numpy().astype(str)),
+                np.char.lower(hm["specie_display_name"].to_numpy().astype(str)))
+        lc_name, lc_display = self._lc_homology
 
-        result = pd.concat(result, ignore_index=True)
-        result = result[result.qualifier_name.isin(query)]
+        mask = np.zeros(len(hm), dtype=bool)
+        for specie in species:
+            specie = specie.lower()
+            mask |= (np.char.find(lc_name, specie) >= 0) | \
+                    (np.char.find(lc_display, specie) >= 0)
 
-        return result["name"].tolist()
+        result = hm[mask & hm.qualifier_name.isin(query).to_numpy()]
+        result = result["name"].tolist()
+        self._hom_attr_cache[cache_key] = tuple(result)
+        return result
@@ -1,4 +1,67 @@
-from .base import FrontBase, DataBase, DataSet
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import logging
+
+import pandas as pd
+
+from . import _cache
+from .base import FrontBase, DataSet
+
+_LOGGER = logging.getLogger(__name__)
+
+
+_VALID_URL_KW = frozenset(("host", "path", "port", "virtual_schema"))
+_FETCH_MANY_KW = frozenset(("attributes", "filters", "only_unique"))
+
+
+def _freeze(url_kwargs):
+    """
+    Drops unknown url keyword arguments and turns the rest
+    into a hashable memoization key
+    """
+    if not url_kwargs:
+        return ()
+    return tuple(sorted((key, url_kwargs[key])
+                        for key in url_kwargs.keys() & _VALID_URL_KW))
+
+
+@lru_cache(maxsize=64)
+def _frontbase(frozen_kwargs):
+    """One FrontBase per connection-parameter combination"""
+    return FrontBase(**dict(frozen_kwargs))
+
+
+@lru_cache(maxsize=64)
+def _dataset(name, frozen_kwargs):
+    """One DataSet per (name, connection parameters) combination"""
+    return DataSet(name=name, **dict(frozen_kwargs))
+
+
+def forget_memoised():
+    """
+    Drops the memoized FrontBase and DataSet instances, forcing the
+    next call to rebuild them (and re-read their metadata)
+    """
+    _frontbase.cache_clear()
+    _dataset.cache_clear()
+
+
+def cache_clear():
+    """
+    Removes all cached BioMart responses,
+    both on disk and within the current process
+    """
+    _cache.clear()
+    DataSet.clear_cache()
+
+
+def cache_info():
+    """
+    Returns the location, entry count and total size
+    of the on-disk response cache as a dictionary
+    """
+    return _cache.info()
 
 
 def list_databases(**url_kwargs):
@@ -26,9 +89,7 @@ def list_databases(**url_kwargs):
         >>> Display name 'Ensembl Regulation 108' corresponds to 'ENSEMBL_MART_FUNCGEN'
 
     """
-    url_kwargs = {k: v for k, v in url_kwargs.items(
-    ) if k in ["host", "path", "port", "virtual_schema"]}
-    return FrontBase(**url_kwargs).print_databases()
+    return _frontbase(_freeze(url_kwargs)).print_databases()
 
 
 def find_dataset(database_name, species, **url_kwargs):
@@ -69,48 +130,189 @@ def find_dataset(database_name, species, **url_kwargs):
 
 
     """
-    databases = FrontBase(**url_kwargs).databases
-    alt_name = database_name.replace(" ", "_").upper()
-
-    database = databases[(databases["name"].isin([alt_name, database_name])) |
-                         (databases["display_name"].isin([alt_name, database_name]))]
-
-    if len(database) == 0:
-        raise ValueError(f"No database found for query '{database_name}'")
-
-    database.reset_index(inplace=True, drop=True)
-    database = database.iloc[0, :]
+    database, species_df = _resolve_datasets(
+        database_name, species, **url_kwargs)
 
     print(
-        f"""Query database name '{database_name}' corresponds to '{database["name"]}'""")
+        f"Query database name '{database_name}' corresponds to '{database.name}'")
     print(
         f"For queried species '{species}', the database contains the following datasets: ")
+    for _, row in species_df.iterrows():
+        print(
+            f"Display name '{row.display_name}' corresponds to '{row['name']}'")
 
-    species_df = DataBase(name=database["name"]).print_species(species)
     return dict(zip(species_df["display_name"], species_df["name"]))
 
 
+def _resolve_datasets(database_name, species, **url_kwargs):
+    """
+    Pure resolution step behind "find_dataset" - returns the matched
+    DataBase and the dataframe of datasets for the queried species
+    without printing anything
+    """
+    front = _frontbase(_freeze(url_kwargs))
+    databases = front.databases
+    alt_name = database_name.replace(" ", "_").upper()
+
+    targets = {alt_name, database_name}
+    matches = [row for row in databases.itertuples(index=False)
+               if row.name in targets or row.display_name in targets]
+
+    if not matches:
+        raise ValueError(f"No database found for query '{database_name}'")
+
+    database = front.get_database(matches[0].name)
+    return database, database.find_species(species)
+
+
 def _fetch_dataset(dataset_name=None, database_name=None, species_name=None, **url_kwargs):
     """
     Precursor to "fetch_data", so I don't bloat code
     """
 
     if dataset_name is not None:
-        return DataSet(name=dataset_name, **url_kwargs)
+        return _dataset(dataset_name, _freeze(url_kwargs))
     if (database_name is not None) and (species_name is not None):
-        datadict = find_dataset(database_name, species_name, **url_kwargs)
-        if len(datadict) > 1:
+        _, species_df = _resolve_datasets(
+            database_name, species_name, **url_kwargs)
+        if len(species_df) > 1:
             raise ValueError(
                 "Too many datasets for given query, narrow the query")
-        dataset_name = list(datadict.values())[0]
-        return DataSet(name=dataset_name, **url_kwargs)
+        return _dataset(species_df["name"].iloc[0], _freeze(url_kwargs))
     raise ValueError(
         "Pass either valid dataset name, or a combination of valid database name with a valid species name")
 
 
+def _fetch_homology_parallel(dataset, attributes, hom_species, hom_query,
+                             filters, only_unique, max_workers,
+                             filter_chunk_size=None):
+    """
+    Fetches homology towards every queried species as its own
+    concurrent BioMart query and merges the per-species dataframes
+    on the shared core attributes. One big homology query is slow on
+    the server side; N small ones overlap their round trips.
+
+    When "filter_chunk_size" is given, every per-species query is
+    additionally split per filter chunk, and the chunks of one species
+    are concatenated before the cross-species merge.
+    """
+    groups = [dataset.extract_homology_attributes([specie], hom_query)
+              for specie in hom_species]
+    groups = [group for group in groups if group]
+    if not groups:
+        if (filters is not None) and (filter_chunk_size is not None):
+            return _fetch_chunked(dataset, attributes, filters, only_unique,
+                                  filter_chunk_size, max_workers)
+        return dataset.fetch(attributes, filters, only_unique)
+
+    if (filters is not None) and (filter_chunk_size is not None):
+        plans = _chunked_filter_plan(filters, filter_chunk_size)
+    else:
+        plans = [filters]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [[executor.submit(dataset.fetch, attributes + group,
+                                    plan, only_unique)
+                    for plan in plans]
+                   for group in groups]
+        results = []
+        for group_futures in futures:
+            frames = [future.result() for future in group_futures]
+            if len(frames) == 1:
+                frame = frames[0]
+            else:
+                frame = pd.concat(frames, ignore_index=True)
+                if only_unique:
+                    frame = frame.drop_duplicates(ignore_index=True)
+            results.append(frame)
+
+    data = results[0]
+    for extra in results[1:]:
+        data = data.merge(extra, how="outer")
+    return data
+
+
+def _validate_query(dataset, attributes, filters):
+    """
+    Drops attributes and filter keys the dataset does not know in one
+    vectorized pass per collection, logging what was removed. Keeps the
+    documented "unknown entries are ignored" behaviour while avoiding
+    queries the server would reject outright.
+    """
+    if attributes is not None:
+        queried = pd.Index(attributes)
+        attribute_df = dataset.attributes
+        valid = queried[queried.isin(attribute_df["name"]) |
+                        queried.isin(attribute_df["display_name"])]
+        dropped = queried.difference(valid)
+        if len(dropped):
+            _LOGGER.warning("Ignoring unknown attributes: %s",
+                            ", ".join(map(str, dropped)))
+        attributes = valid.tolist()
+
+    if filters:
+        keys = pd.Index(list(filters))
+        filter_df = dataset.filters
+        valid_keys = keys[keys.isin(filter_df["name"]) |
+                          keys.isin(filter_df["display_name"])]
+        dropped = keys.difference(valid_keys)
+        if len(dropped):
+            _LOGGER.warning("Ignoring unknown filters: %s",
+                            ", ".join(map(str, dropped)))
+        filters = {key: filters[key] for key in valid_keys}
+
+    return attributes, filters
+
+
+def _chunked_filter_plan(filters, chunk_size):
+    """
+    Splits the highest-cardinality list filter into chunks of at most
+    "chunk_size" values, yielding one filter dictionary per chunk.
+    Scalar filters and lists within the limit are carried unchanged.
+    """
+    split_key = None
+    for key, value in filters.items():
+        if isinstance(value, (list, tuple)) and len(value) > chunk_size:
+            if split_key is None or len(value) > len(filters[split_key]):
+                split_key = key
+    if split_key is None:
+        return [filters]
+
+    values = list(filters[split_key])
+    plans = []
+    for start in range(0, len(values), chunk_size):
+        sub_filters = dict(filters)
+        sub_filters[split_key] = values[start:start + chunk_size]
+        plans.append(sub_filters)
+    return plans
+
+
+def _fetch_chunked(dataset, attributes, filters, only_unique,
+                   chunk_size, max_workers):
+    """
+    Dispatches one concurrent query per filter chunk and concatenates
+    the results. BioMart slows down superlinearly on long filter value
+    lists, so many small queries finish sooner than one huge one.
+    """
+    plans = _chunked_filter_plan(filters, chunk_size)
+    if len(plans) == 1:
+        return dataset.fetch(attributes, filters, only_unique)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(dataset.fetch, attributes, plan, only_unique)
+                   for plan in plans]
+        results = [future.result() for future in futures]
+
+    data = pd.concat(results, ignore_index=True)
+    if only_unique:
+        data = data.drop_duplicates(ignore_index=True)
+    return data
+
+
 def fetch_data(dataset_name=None, database_name=None, species_name=None,
                attributes=None, filters=None,
-               hom_species=None, hom_query=None, only_unique=True, **url_kwargs):
+               hom_species=None, hom_query=None, only_unique=True,
+               max_workers=4, filter_chunk_size=None, **url_kwargs):
     """
     Fetches data from BioMart servers.
     The procedure consists of three operations :
@@ -170,32 +372,97 @@ def fetch_data(dataset_name=None, database_name=None, species_name=None,
         and what percentage of ortholog genes ("perc_id") are identical to their corresponding gene
         in Mexican tetra.
 
+        When more than one homology species is queried, every species is fetched
+        as its own concurrent query (at most "max_workers" at a time) and the
+        per-species results are merged on the core attributes.
+
+    Setting "filter_chunk_size" splits the longest list-valued filter into
+    chunks of that many values and fetches the chunks concurrently - useful
+    when a filter such as "chromosome_name" carries so many values that a
+    single BioMart query slows down or times out.
     """
     dataset = _fetch_dataset(dataset_name, database_name,
                              species_name, **url_kwargs)
 
     if attributes is None:
-        attributes = dataset.attributes[dataset.attributes.default]["name"].tolist(
-        )
+        attributes = list(dataset.default_attributes)
+    attributes, filters = _validate_query(dataset, attributes, filters)
     if (hom_species is not None) and (hom_query is not None):
+        if len(hom_species) > 1:
+            return _fetch_homology_parallel(dataset, attributes, hom_species,
+                                            hom_query, filters, only_unique,
+                                            max_workers, filter_chunk_size)
         attributes = attributes + \
             dataset.extract_homology_attributes(hom_species, hom_query)
 
+    if (filters is not None) and (filter_chunk_size is not None):
+        return _fetch_chunked(dataset, attributes, filters, only_unique,
+                              filter_chunk_size, max_workers)
     return dataset.fetch(attributes, filters, only_unique)
 
 
+def fetch_many(queries, max_concurrency=8, **url_kwargs):
+    """
+    Fetches several datasets concurrently and returns their dataframes
+    as a list in the order the queries were given.
+
+    queries : python iterable of dict
+        Every dictionary holds keyword arguments understood by "fetch_data":
+        either "dataset_name" or a "database_name"/"species_name" pair to
+        choose the dataset, plus optional "attributes", "filters" and
+        "only_unique".
+    max_concurrency : int
+        How many queries run at the same time.
+
+    Example:
+        >>> queries = [{"dataset_name": "hsapiens_gene_ensembl"},
+                       {"dataset_name": "mmusculus_gene_ensembl",
+                        "attributes": ["ensembl_gene_id"]}]
+        >>> human_data, mouse_data = fetch_many(queries)
+
+    Dataset resolution happens up front (reusing the memoized
+    FrontBase/DataSet instances), so only the data queries themselves
+    run in parallel.
+    """
+    jobs = []
+    for query in queries:
+        query = dict(query)
+        dataset = _fetch_dataset(query.pop("dataset_name", None),
+                                 query.pop("database_name", None),
+                                 query.pop("species_name", None),
+                                 **url_kwargs)
+        unknown = query.keys() - _FETCH_MANY_KW
+        if unknown:
+            raise ValueError(
+                f"Unrecognized query keys {sorted(unknown)} - fetch_many "
+                "supports 'dataset_name', 'database_name', 'species_name', "
+                "'attributes', 'filters' and 'only_unique'")
+        jobs.append((dataset, query))
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = [executor.submit(dataset.fetch, query.get("attributes"),
+                                   query.get("filters"),
+                                   query.get("only_unique", True))
+                   for dataset, query in jobs]
+        return [future.result() for future in futures]
+
+
 def get_attributes(dataset_name=None, database_name=None, species_name=None,
                    display=False, **url_kwargs):
     """
     Returns all attributes for a given dataset in the form out pandas DataFrame.
 
     If "display" is set to True, prints out all the attributes.
+
+    The returned dataframe is a shallow view over the dataset's cached
+    attribute table (shared across calls through memoization) - callers
+    who want to mutate it should ".copy()" it first.
     """
     dataset = _fetch_dataset(dataset_name, database_name,
                              species_name, **url_kwargs)
     if display:
         dataset.print_attributes()
-    return dataset.attributes
+    return dataset.attributes.copy(deep=False)
 
 
 def get_filters(dataset_name=None, database_name=None, species_name=None,
@@ -204,10 +471,14 @@ def get_filters(dataset_name=None, database_name=None, species_name=None,
     Returns all filters for a given dataset in the form out pandas DataFrame.
 
     If "display" is set to True, prints out all the filters.
+
+    The returned dataframe is a shallow view over the dataset's cached
+    filter table (shared across calls through memoization) - callers
+    who want to mutate it should ".copy()" it first.
     """
 
     dataset = _fetch_dataset(dataset_name, database_name,
                              species_name, **url_kwargs)
     if display:
         dataset.print_filters()
-    return dataset.filters
+    return dataset.filters.copy(deep=False)
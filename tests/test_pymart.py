@@ -4,10 +4,14 @@ Created on Tue Aug  1 09:33:08 2023
 
 @author: ivanp
 """
+import os
+import time
+
 import requests
 import pytest
 import pandas as pd
 import pymart as pm
+from pymart import _cache, _session, funcs
 
 
 @pytest.mark.parametrize("url_param", [("host", "http://www.nosembl.org"), ("path", "/criomart/martservice"), ("port", 666)])
@@ -52,6 +56,118 @@ def test_filter_getter():
     _validate_dataframe(fils)
 
 
+@pytest.fixture
+def tmp_cache(tmp_path, monkeypatch):
+    # points the on-disk response cache at a throwaway directory
+    monkeypatch.setattr(_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(_cache, "_version_checked", False)
+    return tmp_path
+
+
+def test_cache_roundtrip(tmp_cache):
+    # put/get roundtrip of raw bytes, miss on unknown key
+    key = ("host", 80, "path", "registry")
+    assert _cache.get(key) is None
+    _cache.put(key, b"payload")
+    assert _cache.get(key) == b"payload"
+
+
+def test_cache_expiry(tmp_cache):
+    # entries older than CACHE_TTL are treated as misses
+    key = ("host", 80, "path", "registry")
+    _cache.put(key, b"payload")
+    stale = time.time() - _cache.CACHE_TTL - 1
+    os.utime(_cache._key_path(key), (stale, stale))
+    assert _cache.get(key) is None
+
+
+def test_cache_version_bump(tmp_cache):
+    # a version mismatch drops every stored entry on first use
+    key = ("host", 80, "path", "registry")
+    _cache.put(key, b"payload")
+    with open(os.path.join(str(tmp_cache), "version"), "w") as file:
+        file.write(str(_cache.CACHE_VERSION - 1))
+    _cache._version_checked = False
+    assert _cache.get(key) is None
+    with open(os.path.join(str(tmp_cache), "version")) as file:
+        assert int(file.read()) == _cache.CACHE_VERSION
+
+
+def test_cache_clear_and_info(tmp_cache):
+    # cache_info counts entries, cache_clear removes them
+    _cache.put(("a",), b"x")
+    _cache.put(("b",), b"yy")
+    report = pm.cache_info()
+    assert report["location"] == str(tmp_cache)
+    assert report["entries"] == 2
+    assert report["size_bytes"] == 3
+    pm.cache_clear()
+    assert pm.cache_info()["entries"] == 0
+
+
+def test_token_bucket_paces():
+    # N acquisitions at rate R take at least (N - R) / R seconds
+    rate = 20
+    draws = 26
+    bucket = _session._TokenBucket(rate=rate)
+    start = time.monotonic()
+    for _ in range(draws):
+        bucket.acquire()
+    assert time.monotonic() - start >= (draws - rate) / rate
+
+
+def test_set_rate_limit():
+    # the knob swaps the shared bucket; non-positive rates are rejected
+    original = _session._RateLimitedSession.bucket
+    try:
+        pm.set_rate_limit(10)
+        assert _session._RateLimitedSession.bucket.rate == 10
+        with pytest.raises(ValueError):
+            pm.set_rate_limit(0)
+        with pytest.raises(ValueError):
+            pm.set_rate_limit(-1)
+    finally:
+        _session._RateLimitedSession.bucket = original
+
+
+def test_forget_memoised():
+    # memoised instances are reused until explicitly forgotten
+    first = funcs._frontbase(())
+    assert funcs._frontbase(()) is first
+    pm.forget_memoised()
+    assert funcs._frontbase(()) is not first
+
+
+def test_chunked_plan_no_split():
+    # scalar filters and lists within the limit pass through as one plan
+    filters = {"transcript_tsl": False, "chromosome_name": ["1", "2"]}
+    assert funcs._chunked_filter_plan(filters, 3) == [filters]
+
+
+def test_chunked_plan_splits_longest():
+    # only the highest-cardinality list filter is chunked
+    filters = {"chromosome_name": ["1", "2", "3", "4", "5"],
+               "biotype": ["pseudogene", "protein_coding", "lncRNA"],
+               "transcript_tsl": False}
+    plans = funcs._chunked_filter_plan(filters, 2)
+    assert len(plans) == 3
+    assert [plan["chromosome_name"] for plan in plans] == [
+        ["1", "2"], ["3", "4"], ["5"]]
+    for plan in plans:
+        assert plan["biotype"] == filters["biotype"]
+        assert plan["transcript_tsl"] is False
+
+
+def test_chunked_plan_tie():
+    # on a cardinality tie the first oversized filter is the one split
+    filters = {"first": ["a", "b", "c"], "second": ["d", "e", "f"]}
+    plans = funcs._chunked_filter_plan(filters, 2)
+    assert len(plans) == 2
+    assert [plan["first"] for plan in plans] == [["a", "b"], ["c"]]
+    for plan in plans:
+        assert plan["second"] == filters["second"]
+
+
 def test_mousedataset():
     # tests if we find mmusculus_gene_ensembl and we correctly get attributes
     attributes = ["ensembl_gene_id", "Chromosome/scaffold name", "manbearpig_homology_perc", ]